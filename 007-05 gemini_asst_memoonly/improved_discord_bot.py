@@ -5,15 +5,37 @@
 - LangChain을 활용해 Gemini가 메시지를 정리한 결과를 함께 제공
 """
 import asyncio
+import atexit
 import logging
 import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
+# 로깅 설정 (파일 쓰기는 QueueListener 스레드에서 처리해 이벤트 루프를 막지 않음)
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[QueueHandler(_log_queue)],
+)
+log_listener = QueueListener(
+    _log_queue,
+    logging.StreamHandler(),
+    # 10MB마다 교체하고 최근 3개 파일만 보관
+    RotatingFileHandler(
+        "memo_discord_bot.log", maxBytes=10_000_000, backupCount=3, encoding="utf-8"
+    ),
+)
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger(__name__)
+
 # 패키지 경로 추가
 CURRENT_DIR = os.path.dirname(__file__)
 sys.path.append(os.path.join(CURRENT_DIR, "langgraph_agents"))
@@ -29,17 +51,6 @@ from langgraph_agents.agents import agent_executor  # noqa: E402
 from langgraph_agents.services import MemoRefiner, NotionAgent  # noqa: E402
 from langgraph_agents.state import state_manager, TaskStatus  # noqa: E402
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("memo_discord_bot.log", encoding="utf-8"),
-    ],
-)
-logger = logging.getLogger(__name__)
-
 logger.info("📝 Discord → Notion 메모 봇 시작")
 
 # Discord 설정
@@ -51,18 +62,45 @@ bot = commands.Bot(command_prefix="!", intents=intents)
 TARGET_CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID", "0"))
 BLOCKED_CHANNEL_ID = int(os.getenv("BLOCKED_CHANNEL_ID", "1425020218182467665"))
 
-# 에이전트 등록 여부 플래그
-_notion_agent_registered = False
+# 1이면 on_ready 때 접속한 서버/채널 목록을 로그로 남김
+LOG_GUILD_ENUMERATION = os.getenv("LOG_GUILD_ENUMERATION") == "1"
+
+# Discord 메시지 최대 길이
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Notion 기본 속성값
+DEFAULT_PRIORITY = os.getenv("NOTION_DEFAULT_PRIORITY", "Medium")
+DEFAULT_STATUS = os.getenv("NOTION_DEFAULT_STATUS", "To Do")
+
+# 등록된 Notion 에이전트 (최초 등록 전에는 None)
+notion_agent: Optional[NotionAgent] = None
+_notion_register_lock = asyncio.Lock()
 memo_refiner: Optional[MemoRefiner] = None
+_guild_log_task: Optional[asyncio.Task] = None
+
+
+async def _log_guilds(guilds: list):
+    """서버/채널 목록을 모아 한 번의 로그로 남김"""
+    lines = ["📋 접속한 서버 목록"]
+    for guild in guilds:
+        lines.append(f"📋 서버: {guild.name} (ID: {guild.id})")
+        lines.extend(f"   📢 #{channel.name} (ID: {channel.id})" for channel in guild.text_channels)
+    logger.info("\n".join(lines))
 
 
 async def ensure_notion_registered():
     """Notion 에이전트가 한 번만 등록되도록 보장"""
-    global _notion_agent_registered
-    if not _notion_agent_registered:
-        agent_executor.register_agent(NotionAgent())
-        _notion_agent_registered = True
-        logger.info("📝 NotionAgent 등록 완료")
+    global notion_agent
+    if notion_agent is not None:
+        return
+
+    async with _notion_register_lock:
+        if notion_agent is None:
+            agent = NotionAgent()
+            await agent.setup()
+            agent_executor.register_agent(agent)
+            notion_agent = agent
+            logger.info("📝 NotionAgent 등록 완료")
 
 
 def truncate(text: str, limit: int = 600) -> str:
@@ -73,51 +111,72 @@ def truncate(text: str, limit: int = 600) -> str:
     return text[:cutoff] + "..."
 
 
+def split_discord_message(text: str, limit: int = DISCORD_MESSAGE_LIMIT) -> list:
+    """Discord 길이 제한을 넘지 않도록 줄 단위로 메시지를 분할"""
+    chunks = []
+    current = []
+    size = 0
+    for line in (text or "").split("\n"):
+        for start in range(0, max(len(line), 1), limit):
+            piece = line[start : start + limit]
+            extra = len(piece) + (1 if current else 0)
+            if current and size + extra > limit:
+                chunks.append("\n".join(current))
+                current = []
+                size = 0
+                extra = len(piece)
+            current.append(piece)
+            size += extra
+    if current:
+        chunks.append("\n".join(current))
+    return chunks or [""]
+
+
 def _heading_block(text: str) -> dict:
     return {
         "object": "block",
         "type": "heading_2",
-        "heading_2": {
-            "rich_text": [
-                {
-                    "type": "text",
-                    "text": {"content": text},
-                }
-            ]
-        },
+        "heading_2": {"rich_text": [{"type": "text", "text": {"content": text}}]},
     }
 
 
 def _paragraph_block(text: str, link: Optional[str] = None) -> dict:
-    rich_text = {
-        "type": "text",
-        "text": {"content": text},
-    }
+    text_obj = {"content": text}
     if link:
-        rich_text["text"]["link"] = {"url": link}
+        text_obj["link"] = {"url": link}
 
     return {
         "object": "block",
         "type": "paragraph",
-        "paragraph": {
-            "rich_text": [rich_text],
-        },
+        "paragraph": {"rich_text": [{"type": "text", "text": text_obj}]},
     }
 
 
+def _paragraph_blocks(text: str) -> list:
+    """텍스트를 분할해 단락 블록 목록으로 변환 (청크마다 함수 호출 없이 생성)"""
+    return [
+        {
+            "object": "block",
+            "type": "paragraph",
+            "paragraph": {"rich_text": [{"type": "text", "text": {"content": chunk}}]},
+        }
+        for chunk in _chunk_text(text)
+    ]
+
+
 def _chunk_text(text: str, chunk_size: int = 1800) -> list:
     """Notion 블록 길이를 초과하지 않도록 텍스트를 분할"""
-    chunks = []
     text = text or ""
-    for i in range(0, len(text), chunk_size):
-        chunks.append(text[i : i + chunk_size])
-    return chunks or [""]
+    if len(text) <= chunk_size:
+        return [text]
+    return [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
 
 
 def build_task_params(
     message: discord.Message,
     original_text: str,
     analysis: dict,
+    include_description: bool = True,
 ) -> Optional[dict]:
     original = (original_text or "").strip()
     refined = (analysis.get("refined_summary") or "").strip()
@@ -130,31 +189,34 @@ def build_task_params(
     title = first_line[:100] if first_line else "새 메모"
 
     category = analysis.get("category") or "미분류"
-    priority = analysis.get("priority") or os.getenv("NOTION_DEFAULT_PRIORITY", "Medium")
+    priority = analysis.get("priority") or DEFAULT_PRIORITY
     tags = analysis.get("tags") or []
     action_required = analysis.get("action_required", False)
     notes = analysis.get("notes") or ""
 
-    description_parts = [
-        "[Discord 메시지]",
-        message.jump_url or "(링크 없음)",
-        "",
-        f"요약: {refined or '(생성되지 않음)'}",
-        f"카테고리: {category}",
-        f"우선순위: {priority}",
-        f"태그: {', '.join(tags) if tags else '없음'}",
-        f"후속 작업 필요: {'예' if action_required else '아니오'}",
-    ]
-    if notes:
-        description_parts.append(f"추가 메모: {notes}")
-    description_parts.extend(
-        [
+    # DB에 설명 속성이 없으면 children 블록과 겹치는 description은 만들지 않음
+    description = ""
+    if include_description:
+        description_parts = [
+            "[Discord 메시지]",
+            message.jump_url or "(링크 없음)",
             "",
-            "원문:",
-            original or "(내용 없음)",
+            f"요약: {refined or '(생성되지 않음)'}",
+            f"카테고리: {category}",
+            f"우선순위: {priority}",
+            f"태그: {', '.join(tags) if tags else '없음'}",
+            f"후속 작업 필요: {'예' if action_required else '아니오'}",
         ]
-    )
-    description = "\n".join(description_parts)
+        if notes:
+            description_parts.append(f"추가 메모: {notes}")
+        description_parts.extend(
+            [
+                "",
+                "원문:",
+                original or "(내용 없음)",
+            ]
+        )
+        description = "\n".join(description_parts)
 
     children = []
     if message.jump_url:
@@ -170,26 +232,22 @@ def build_task_params(
     ]
     if notes:
         analysis_lines.append(f"추가 메모: {notes}")
-    analysis_text = "\n".join(analysis_lines)
-    for chunk in _chunk_text(analysis_text):
-        children.append(_paragraph_block(chunk))
+    children.extend(_paragraph_blocks("\n".join(analysis_lines)))
 
     if refined:
         children.append(_heading_block("📝 정제본"))
-        for chunk in _chunk_text(refined):
-            children.append(_paragraph_block(chunk))
+        children.extend(_paragraph_blocks(refined))
 
     if original:
         children.append(_heading_block("📥 원문"))
-        for chunk in _chunk_text(original):
-            children.append(_paragraph_block(chunk))
+        children.extend(_paragraph_blocks(original))
 
     return {
         "task_id": f"memo_{message.id}",
         "action": "create_task",
         "title": title,
         "description": description,
-        "status": os.getenv("NOTION_DEFAULT_STATUS", "To Do"),
+        "status": DEFAULT_STATUS,
         "priority": priority,
         "channel": message.channel.name,
         "children": children,
@@ -198,26 +256,25 @@ def build_task_params(
 
 @bot.event
 async def on_ready():
-    global memo_refiner
+    global memo_refiner, _guild_log_task
 
-    logger.info(f"✅ 봇 로그인: {bot.user}")
-    logger.info(f"🎯 타겟 채널: {TARGET_CHANNEL_ID or '전체 허용'}")
-    logger.info(f"🚫 차단 채널: {BLOCKED_CHANNEL_ID}")
+    logger.info("✅ 봇 로그인: %s", bot.user)
+    logger.info("🎯 타겟 채널: %s", TARGET_CHANNEL_ID or "전체 허용")
+    logger.info("🚫 차단 채널: %s", BLOCKED_CHANNEL_ID)
 
-    for guild in bot.guilds:
-        logger.info(f"📋 서버: {guild.name} (ID: {guild.id})")
-        for channel in guild.text_channels:
-            logger.info(f"   📢 #{channel.name} (ID: {channel.id})")
+    if LOG_GUILD_ENUMERATION:
+        _guild_log_task = asyncio.create_task(_log_guilds(list(bot.guilds)))
 
     await state_manager.start()
     await ensure_notion_registered()
 
-    try:
-        memo_refiner = MemoRefiner()
-        logger.info("✨ MemoRefiner 초기화 완료")
-    except Exception as exc:  # pylint: disable=broad-except
-        memo_refiner = None
-        logger.error("❌ MemoRefiner 초기화 실패: %s", exc)
+    # 재연결 시에도 on_ready가 다시 호출되므로 기존 Gemini 클라이언트를 재사용
+    if memo_refiner is None:
+        try:
+            memo_refiner = MemoRefiner()
+            logger.info("✨ MemoRefiner 초기화 완료")
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("❌ MemoRefiner 초기화 실패: %s", exc)
 
 
 @bot.event
@@ -260,7 +317,13 @@ async def on_message(message: discord.Message):
         analysis_success,
     )
 
-    params = build_task_params(message, original_text, analysis)
+    params = build_task_params(
+        message,
+        original_text,
+        analysis,
+        # 아직 스키마를 모르면 기존처럼 description을 함께 전달
+        include_description=notion_agent is None or notion_agent.has_description_property,
+    )
     if not params:
         await message.reply("❌ 메모로 저장할 텍스트를 찾을 수 없습니다.")
         return
@@ -292,6 +355,8 @@ async def on_message(message: discord.Message):
                 lines.append("⚠️ Gemini 분석에 실패하여 기본값을 사용했습니다.")
             elif analysis.get("notes"):
                 lines.append(f"메모: {analysis['notes']}")
+            if result.result and result.result.get("partial"):
+                lines.append(f"⚠️ 본문 블록 {result.result['missing_blocks']}개를 노션 페이지에 추가하지 못했습니다.")
             lines.append("")
             lines.append("**요약**")
             lines.append(truncate(refined_text))
@@ -299,13 +364,20 @@ async def on_message(message: discord.Message):
             lines.append("**원문**")
             lines.append(truncate(original_text))
 
-            await status_message.edit(content="\n".join(lines))
+            chunks = split_discord_message("\n".join(lines))
+            await status_message.edit(content=chunks[0])
+            for chunk in chunks[1:]:
+                await message.channel.send(chunk)
         else:
-            await status_message.edit(content=f"❌ 노션 저장 실패: {result.error}")
+            await status_message.edit(
+                content=truncate(f"❌ 노션 저장 실패: {result.error}", DISCORD_MESSAGE_LIMIT)
+            )
 
     except Exception as exc:  # pylint: disable=broad-except
         logger.exception("노션 메모 저장 중 오류 발생")
-        await status_message.edit(content=f"❌ 처리 중 오류가 발생했습니다: {exc}")
+        await status_message.edit(
+            content=truncate(f"❌ 처리 중 오류가 발생했습니다: {exc}", DISCORD_MESSAGE_LIMIT)
+        )
     finally:
         await state_manager.close_session(session_id)
 
@@ -323,8 +395,20 @@ async def main():
         await state_manager.stop()
 
 
-if __name__ == "__main__":
+def run():
+    """uvloop이 설치되어 있으면 해당 이벤트 루프로 봇을 실행"""
     try:
+        import uvloop
+    except ImportError:
         asyncio.run(main())
+        return
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(main())
+
+
+if __name__ == "__main__":
+    try:
+        run()
     except KeyboardInterrupt:
         logger.info("👋 봇 종료")
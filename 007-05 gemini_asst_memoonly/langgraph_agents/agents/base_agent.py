@@ -1,4 +1,5 @@
 import asyncio
+import random
 import time
 import logging
 from abc import ABC, abstractmethod
@@ -9,12 +10,65 @@ from ..state.manager import state_manager
 
 logger = logging.getLogger(__name__)
 
+# 재시도 대기 시간(초): 0 ~ min(CAP, BASE * 2^attempt) 사이 무작위 (full jitter)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_CAP = 10.0
+
+
+def retry_backoff(attempt: int) -> float:
+    """attempt번째 재시도 전 대기 시간(초)"""
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+# execute_parallel 동시 실행 워커 수
+PARALLEL_WORKERS = 5
+
+
+class CircuitBreaker:
+    """연속 실패가 임계치에 도달하면 일정 시간 동안 호출을 차단"""
+
+    def __init__(self, fail_threshold: int = 5, reset_after: float = 30.0):
+        self.fail_threshold = fail_threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """열림 또는 half-open(시험 호출 대기/진행 중) 상태"""
+        return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at < self.reset_after or self._half_open_in_flight:
+            return False
+        # half-open: 첫 호출 하나만 시험 호출로 통과 (await 없이 점유하므로 경합 없음)
+        self._half_open_in_flight = True
+        return True
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._half_open_in_flight or self._failures >= self.fail_threshold:
+            self._opened_at = time.monotonic()
+        self._half_open_in_flight = False
+
+    def release_probe(self):
+        """결과 없이 끝난 시험 호출(취소 등)의 자리를 반납"""
+        self._half_open_in_flight = False
+
 
 class BaseAgent(ABC):
     def __init__(self, name: str, max_retries: int = 3):
         self.name = name
         self.max_retries = max_retries
         self.logger = logging.getLogger(f"agent.{name}")
+        self._breaker = CircuitBreaker()
 
     @abstractmethod
     async def execute(self, state: WorkflowState, task_params: Dict[str, Any]) -> ExecutionResult:
@@ -22,30 +76,32 @@ class BaseAgent(ABC):
         raise NotImplementedError
 
     async def run_with_metrics(self, state: WorkflowState, task_params: Dict[str, Any]) -> ExecutionResult:
-        start_time = time.time()
-        task_id = task_params.get("task_id", f"{self.name}_{int(start_time)}")
+        start_time = time.monotonic()
+        task_id = task_params.get("task_id", f"{self.name}_{int(time.time())}")
 
         try:
-            self.logger.info(f"Starting execution: {task_id}")
+            self.logger.info("Starting execution: %s", task_id)
 
             result = await self._execute_with_retry(state, task_params)
 
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
             result.execution_time = execution_time
 
             # 메트릭 업데이트
             success = result.status == TaskStatus.COMPLETED
-            await state_manager.update_agent_metrics(self.name, success, execution_time)
+            await state_manager.update_agent_metrics(
+                self.name, success, execution_time, circuit_open=self._breaker.is_open
+            )
 
             if success:
-                self.logger.info(f"Completed execution: {task_id} in {execution_time:.2f}s")
+                self.logger.info("Completed execution: %s in %.2fs", task_id, execution_time)
             else:
-                self.logger.error(f"Failed execution: {task_id} - {result.error}")
+                self.logger.error("Failed execution: %s - %s", task_id, result.error)
 
             return result
 
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
             error_result = ExecutionResult(
                 task_id=task_id,
                 status=TaskStatus.FAILED,
@@ -53,19 +109,43 @@ class BaseAgent(ABC):
                 execution_time=execution_time
             )
 
-            await state_manager.update_agent_metrics(self.name, False, execution_time)
-            self.logger.error(f"Exception in execution: {task_id} - {e}")
+            await state_manager.update_agent_metrics(
+                self.name, False, execution_time, circuit_open=self._breaker.is_open
+            )
+            self.logger.error("Exception in execution: %s - %s", task_id, e)
 
             return error_result
 
     async def _execute_with_retry(self, state: WorkflowState, task_params: Dict[str, Any]) -> ExecutionResult:
+        if not self._breaker.allow_request():
+            # 연속 실패로 차단된 동안(또는 시험 호출 진행 중)에는 호출 없이 바로 실패 처리
+            return ExecutionResult(
+                task_id=task_params.get("task_id", f"{self.name}_failed"),
+                status=TaskStatus.FAILED,
+                error=f"Circuit open for {self.name}",
+            )
+
+        # 재시도를 모두 거친 호출 결과만 차단기에 한 번 반영
+        result = None
+        try:
+            result = await self._run_attempts(state, task_params)
+        finally:
+            if result is not None and result.status == TaskStatus.COMPLETED:
+                self._breaker.record_success()
+            elif result is not None and result.status == TaskStatus.FAILED:
+                self._breaker.record_failure()
+            else:
+                self._breaker.release_probe()
+        return result
+
+    async def _run_attempts(self, state: WorkflowState, task_params: Dict[str, Any]) -> ExecutionResult:
         last_error = None
 
         for attempt in range(self.max_retries + 1):
             try:
                 if attempt > 0:
-                    wait_time = 2 ** attempt
-                    self.logger.info(f"Retrying {self.name} (attempt {attempt + 1}) in {wait_time}s")
+                    wait_time = retry_backoff(attempt)
+                    self.logger.info("Retrying %s (attempt %d) in %.2fs", self.name, attempt + 1, wait_time)
                     await asyncio.sleep(wait_time)
 
                 result = await self.execute(state, task_params)
@@ -108,44 +188,43 @@ class AgentExecutor:
 
     def register_agent(self, agent: BaseAgent):
         self.agents[agent.name] = agent
-        logger.info(f"Registered agent: {agent.name}")
+        logger.info("Registered agent: %s", agent.name)
 
     async def execute_agent(self, agent_name: str, state: WorkflowState, task_params: Dict[str, Any]) -> ExecutionResult:
-        if agent_name not in self.agents:
+        agent = self.agents.get(agent_name)
+        if agent is None:
             return ExecutionResult(
                 task_id=task_params.get("task_id", "unknown"),
                 status=TaskStatus.FAILED,
                 error=f"Agent {agent_name} not found"
             )
 
-        agent = self.agents[agent_name]
         return await agent.run_with_metrics(state, task_params)
 
     async def execute_parallel(self, tasks: List[Dict[str, Any]], state: WorkflowState) -> List[ExecutionResult]:
-        semaphore = asyncio.Semaphore(5)  # 최대 5개 동시 실행
-
-        async def execute_with_semaphore(task):
-            async with semaphore:
-                agent_name = task.get("agent")
-                return await self.execute_agent(agent_name, state, task)
-
-        results = await asyncio.gather(
-            *[execute_with_semaphore(task) for task in tasks],
-            return_exceptions=True
-        )
-
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append(ExecutionResult(
-                    task_id=tasks[i].get("task_id", f"task_{i}"),
-                    status=TaskStatus.FAILED,
-                    error=str(result)
-                ))
-            else:
-                processed_results.append(result)
-
-        return processed_results
+        # 작업 수만큼 코루틴을 만들지 않고 최대 5개의 워커가 큐에서 꺼내 실행
+        results: List[Optional[ExecutionResult]] = [None] * len(tasks)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(tasks):
+            queue.put_nowait(item)
+
+        async def worker():
+            while not queue.empty():
+                i, task = queue.get_nowait()
+                try:
+                    results[i] = await self.execute_agent(task.get("agent"), state, task)
+                except Exception as e:  # pylint: disable=broad-except
+                    results[i] = ExecutionResult(
+                        task_id=task.get("task_id", f"task_{i}"),
+                        status=TaskStatus.FAILED,
+                        error=str(e)
+                    )
+
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(PARALLEL_WORKERS, len(tasks))):
+                tg.create_task(worker())
+
+        return results
 
 
 # 글로벌 executor 인스턴스
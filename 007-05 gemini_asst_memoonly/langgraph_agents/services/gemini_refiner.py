@@ -1,14 +1,126 @@
 import asyncio
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
-from typing import Any, Dict, Optional
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
 import google.generativeai as genai
 
 
 logger = logging.getLogger(__name__)
 
+_PROMPT_PREAMBLE = (
+    "너는 업무 메모를 정리하는 비서야. 아래 메시지를 분석해서 JSON으로만 답해.\n"
+    "필수 키: refined_summary(간결한 한국어 정제 요약), category(짧은 카테고리),"
+    " priority(LOW/MEDIUM/HIGH/URGENT 중 하나), tags(관련 키워드 배열),"
+    " action_required(true/false), notes(추가 메모, 없으면 빈 문자열).\n"
+    "JSON 이외의 설명은 포함하지 마.\n\n"
+)
+# 프롬프트 내용이 바뀌면 올려서 이전 캐시 결과를 무효화
+_PROMPT_VERSION = 1
+_JSON_DECODER = json.JSONDecoder()
+# 응답 객체로 인정하려면 이 중 하나 이상의 키가 있어야 함
+_ANALYSIS_KEYS = frozenset(
+    ("refined_summary", "category", "priority", "tags", "action_required", "notes")
+)
+_MODEL_CANDIDATES = (
+    "gemini-2.5-flash",
+    "gemini-2.0-flash",
+    "gemini-1.5-flash",
+    "gemini-1.5-pro",
+    "gemini-1.0-pro",
+    "gemini-pro",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_model(api_key: str, preferred: Optional[str]) -> "genai.GenerativeModel":
+    """genai 설정과 모델 탐색을 (API 키, 선호 모델) 조합당 한 번만 수행."""
+    genai.configure(api_key=api_key)
+
+    candidates = [preferred] if preferred else []
+    candidates.extend(_MODEL_CANDIDATES)
+    for name in candidates:
+        try:
+            model = genai.GenerativeModel(model_name=name)
+            logger.info("MemoRefiner using Gemini model: %s", name)
+            return model
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning("Gemini 모델 %s 초기화 실패: %s", name, err)
+
+    raise RuntimeError("사용 가능한 Gemini 모델을 찾을 수 없습니다.")
+
+
+class _JsonObjectTracker:
+    """스트리밍 조각을 받아 최상위 JSON 객체가 닫혔는지 추적."""
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        # 객체가 닫힌 문자의 piece 내 위치
+        self.close_pos = -1
+
+    def feed(self, piece: str) -> bool:
+        for pos, char in enumerate(piece):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.started:
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+                self.started = True
+            elif char == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.close_pos = pos
+                    return True
+        return False
+
+
+class _AnalysisDiskCache:
+    """정제 결과를 sqlite에 보관해 프로세스 재시작 후에도 재사용."""
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses "
+                "(key BLOB PRIMARY KEY, json TEXT NOT NULL, ts INTEGER NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM analyses WHERE ts < ?", (int(time.time() - ttl),))
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT json FROM analyses WHERE key = ? AND ts >= ?",
+                (key, int(time.time() - self.ttl)),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: bytes, value: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, json, ts) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), int(time.time())),
+            )
+
 
 class MemoRefiner:
     """Gemini 모델을 활용해 Discord 원문을 정제하고 업무 메타데이터를 생성."""
@@ -22,57 +134,158 @@ class MemoRefiner:
         "notes": "AI 분석 실패로 기본값 적용",
         "analysis_success": False,
     }
+    # 이미 정규화된 값도 포함해 대부분의 응답은 strip/upper 없이 바로 조회
+    PRIORITY_MAP: Dict[str, str] = {
+        "Low": "Low",
+        "Medium": "Medium",
+        "High": "High",
+        "Urgent": "Urgent",
+        "LOW": "Low",
+        "MEDIUM": "Medium",
+        "MID": "Medium",
+        "HIGH": "High",
+        "URGENT": "Urgent",
+    }
+    CACHE_MAX_SIZE = 512
+    CACHE_TTL = 600
+    DISK_CACHE_TTL = 7 * 24 * 60 * 60
 
     def __init__(self):
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY 환경변수가 필요합니다.")
 
-        genai.configure(api_key=api_key)
-
-        preferred = os.getenv("GEMINI_LLM_MODEL")
-        candidates = []
-        if preferred:
-            candidates.append(preferred)
-        candidates.extend([
-            "gemini-2.5-flash",
-            "gemini-2.0-flash",
-            "gemini-1.5-flash",
-            "gemini-1.5-pro",
-            "gemini-1.0-pro",
-            "gemini-pro",
-        ])
-
-        self.model = None
-        for name in candidates:
-            try:
-                self.model = genai.GenerativeModel(model_name=name)
-                logger.info("MemoRefiner using Gemini model: %s", name)
-                break
-            except Exception as err:  # pylint: disable=broad-except
-                logger.warning("Gemini 모델 %s 초기화 실패: %s", name, err)
+        self.model = _resolve_model(api_key, os.getenv("GEMINI_LLM_MODEL"))
 
-        if not self.model:
-            raise RuntimeError("사용 가능한 Gemini 모델을 찾을 수 없습니다.")
+        self._cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # sqlite 연결/만료 정리는 이벤트 루프 밖에서 하도록 첫 조회 때 연다
+        self._disk_cache: Optional[_AnalysisDiskCache] = None
+        self._disk_cache_opened = False
+        self._disk_open_lock = asyncio.Lock()
+        self._llm_sem = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+        self._generation_config = {"temperature": float(os.getenv("GEMINI_TEMPERATURE", "0.4"))}
 
     async def analyze(self, text: str) -> Dict[str, Any]:
-        """원문을 입력 받아 정제 요약 및 분류 정보를 반환."""
-        prompt = (
-            "너는 업무 메모를 정리하는 비서야. 아래 메시지를 분석해서 JSON으로만 답해.\n"
-            "필수 키: refined_summary(간결한 한국어 정제 요약), category(짧은 카테고리),"
-            " priority(LOW/MEDIUM/HIGH/URGENT 중 하나), tags(관련 키워드 배열),"
-            " action_required(true/false), notes(추가 메모, 없으면 빈 문자열).\n"
-            "JSON 이외의 설명은 포함하지 마.\n\n"
-            f"메시지: {text}"
+        """원문을 입력 받아 정제 요약 및 분류 정보를 반환.
+
+        같은 원문은 캐시에서 돌려주고, 진행 중인 호출이 있으면 그 결과를 함께 기다린다.
+        """
+        # 공백/줄바꿈/대소문자만 다른 메시지는 같은 키를 갖도록 정규화
+        normalized = " ".join((text or "").split()).lower()
+        if not normalized:
+            # 첨부파일만 있는 메시지 등은 Gemini를 호출하지 않음
+            return self._fallback(original=text or "", reason="분석할 텍스트 없음")
+
+        key = self._cache_key(normalized)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._record_hit("memory")
+            return copy.deepcopy(cached)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._analyze_and_cache(key, text))
+            self._inflight[key] = task
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _analyze_and_cache(self, key: bytes, text: str) -> Dict[str, Any]:
+        try:
+            result = await self._disk_get(key)
+            if result is not None:
+                self._record_hit("disk")
+                self._cache_put(key, result)
+                return result
+
+            self._cache_misses += 1
+            result = await self._generate_analysis(text)
+        finally:
+            self._inflight.pop(key, None)
+
+        if result.get("analysis_success"):
+            self._cache_put(key, result)
+            await self._disk_put(key, result)
+        return result
+
+    def _cache_key(self, normalized: str) -> bytes:
+        model_name = getattr(self.model, "model_name", "")
+        payload = f"{model_name}\0{_PROMPT_VERSION}\0{normalized}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def _record_hit(self, tier: str) -> None:
+        self._cache_hits += 1
+        logger.info(
+            "Gemini 분석 캐시 적중(%s): hit=%d miss=%d",
+            tier,
+            self._cache_hits,
+            self._cache_misses,
         )
 
+    def _open_disk_cache(self) -> Optional[_AnalysisDiskCache]:
+        # .env 값은 ~ 가 확장되지 않으므로 직접 확장
+        path = os.path.expanduser(
+            os.getenv("GEMINI_CACHE_PATH") or os.path.join("~", ".cache", "memo_refiner.sqlite")
+        )
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt,
-                generation_config={"temperature": float(os.getenv("GEMINI_TEMPERATURE", "0.4"))},
-            )
-            raw = getattr(response, "text", "") or ""
+            return _AnalysisDiskCache(path, self.DISK_CACHE_TTL)
+        except (OSError, sqlite3.Error) as err:
+            logger.warning("Gemini 분석 디스크 캐시 비활성화 (%s): %s", path, err)
+            return None
+
+    async def _get_disk_cache(self) -> Optional[_AnalysisDiskCache]:
+        if not self._disk_cache_opened:
+            async with self._disk_open_lock:
+                if not self._disk_cache_opened:
+                    self._disk_cache = await asyncio.to_thread(self._open_disk_cache)
+                    self._disk_cache_opened = True
+        return self._disk_cache
+
+    async def _disk_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        disk_cache = await self._get_disk_cache()
+        if disk_cache is None:
+            return None
+        try:
+            return await asyncio.to_thread(disk_cache.get, key)
+        except (sqlite3.Error, ValueError) as err:
+            logger.warning("Gemini 분석 디스크 캐시 조회 실패: %s", err)
+            return None
+
+    async def _disk_put(self, key: bytes, value: Dict[str, Any]) -> None:
+        disk_cache = await self._get_disk_cache()
+        if disk_cache is None:
+            return
+        try:
+            await asyncio.to_thread(disk_cache.put, key, value)
+        except sqlite3.Error as err:
+            logger.warning("Gemini 분석 디스크 캐시 저장 실패: %s", err)
+
+    def _cache_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self.CACHE_TTL:
+            del self._cache[key]
+            return None
+
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: bytes, value: Dict[str, Any]) -> None:
+        self._cache[key] = (time.monotonic(), value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_MAX_SIZE:
+            self._cache.popitem(last=False)
+
+    async def _generate_analysis(self, text: str) -> Dict[str, Any]:
+        prompt = f"{_PROMPT_PREAMBLE}메시지: {text}"
+
+        try:
+            async with self._llm_sem:
+                raw = await self._generate_streamed(prompt)
             logger.debug("Gemini raw response: %s", raw)
             parsed = self._parse_json(raw)
             return self._normalize(parsed, original=text)
@@ -83,6 +296,22 @@ class MemoRefiner:
             logger.exception("Gemini 분석 호출 실패")
             return self._fallback(original=text, reason="Gemini 호출 실패")
 
+    async def _generate_streamed(self, prompt: str) -> str:
+        """응답을 스트리밍으로 받다가 JSON 객체가 닫히면 나머지 생성을 기다리지 않는다."""
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=self._generation_config,
+            stream=True,
+        )
+        tracker = _JsonObjectTracker()
+        parts = []
+        async for chunk in response:
+            piece = getattr(chunk, "text", "") or ""
+            parts.append(piece)
+            if tracker.feed(piece):
+                break
+        return "".join(parts)
+
     @classmethod
     def _fallback(cls, original: str, reason: str = "") -> Dict[str, Any]:
         data = dict(cls.FALLBACK_ANALYSIS)
@@ -93,22 +322,29 @@ class MemoRefiner:
 
     @staticmethod
     def _parse_json(content: str) -> Dict[str, Any]:
-        text = (content or "").strip()
+        """응답에서 처음으로 해석 가능한 최상위 JSON 객체를 반환 (코드 펜스/앞뒤 설명 무시).
 
-        if text.startswith("```"):
-            text = text.strip("`")
-            if "\n" in text:
-                text = text.split("\n", 1)[1]
-            text = text.lstrip()
-            if text.lower().startswith("json"):
-                text = text[4:].lstrip()
+        깨진 객체 안쪽의 중첩 객체나 분석 키가 하나도 없는 객체는 결과로 쓰지 않는다.
+        """
+        text = content or ""
+        idx = text.find("{")
+        while idx != -1:
+            try:
+                parsed, end = _JSON_DECODER.raw_decode(text, idx)
+                if not _ANALYSIS_KEYS.isdisjoint(parsed):
+                    return parsed
+                idx = text.find("{", end)
+                continue
+            except json.JSONDecodeError:
+                pass
 
-        if not text.startswith("{"):
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if match:
-                text = match.group(0)
+            # 해석에 실패한 객체의 범위를 건너뛰어 다음 최상위 후보만 시도
+            tracker = _JsonObjectTracker()
+            if not tracker.feed(text[idx:]):
+                break
+            idx = text.find("{", idx + tracker.close_pos + 1)
 
-        return json.loads(text)
+        raise json.JSONDecodeError("JSON 객체를 찾을 수 없습니다", text, 0)
 
     @staticmethod
     def _extract_text(content: Optional[str]) -> str:
@@ -123,15 +359,11 @@ class MemoRefiner:
 
         refined = data.get("refined_summary") or original.strip()
 
-        priority = (data.get("priority") or "Medium").strip().upper()
-        priority_map = {
-            "LOW": "Low",
-            "MEDIUM": "Medium",
-            "MID": "Medium",
-            "HIGH": "High",
-            "URGENT": "Urgent",
-        }
-        normalized_priority = priority_map.get(priority, "Medium")
+        priority = data.get("priority")
+        normalized_priority = self.PRIORITY_MAP.get(priority) if isinstance(priority, str) else None
+        if normalized_priority is None:
+            priority = (priority or "Medium").strip().upper()
+            normalized_priority = self.PRIORITY_MAP.get(priority, "Medium")
 
         tags = data.get("tags") or []
         if isinstance(tags, str):
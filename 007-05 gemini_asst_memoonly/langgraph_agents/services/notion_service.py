@@ -1,65 +1,162 @@
+import asyncio
+import json
 import logging
 import os
-from typing import Dict, Any
+import time
+from typing import Any, Callable, Dict, Optional
 
-from notion_client import Client
+from notion_client import AsyncClient
 
-from ..agents.base_agent import BaseAgent
+from ..agents.base_agent import BaseAgent, retry_backoff
 from ..state.models import WorkflowState, ExecutionResult, TaskStatus
 
 
 logger = logging.getLogger(__name__)
 
+# Notion API는 요청당 최대 100개의 블록만 허용
+NOTION_MAX_BLOCKS_PER_REQUEST = 100
+
+# 페이지 생성 후 블록 추가가 실패했을 때 배치별 재시도 횟수
+NOTION_APPEND_RETRIES = 2
+
+# DB 스키마 디스크 캐시 유효 기간(초)
+SCHEMA_CACHE_TTL = 24 * 60 * 60
+
+# rich_text 한 조각의 최대 길이
+NOTION_MAX_TEXT_LENGTH = 2000
+
+# 채널 속성 타입별 값 생성 함수 (스키마 로딩 시 한 번 선택)
+CHANNEL_VALUE_BUILDERS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "rich_text": lambda value: {"rich_text": [{"text": {"content": value}}]},
+    "title": lambda value: {"title": [{"text": {"content": value}}]},
+    "select": lambda value: {"select": {"name": value}},
+    "multi_select": lambda value: {"multi_select": [{"name": value}]},
+}
+
 
 class NotionAgent(BaseAgent):
     """Discord 입력을 Notion 데이터베이스에 메모로 저장하는 에이전트"""
 
     def __init__(self):
         super().__init__("notion_agent")
-        self.client = Client(auth=os.getenv("NOTION_API_KEY"))
+        self.client = AsyncClient(auth=os.getenv("NOTION_API_KEY"))
         self.database_id = os.getenv("NOTION_DATABASE_ID")
         self.properties_schema: Dict[str, Dict[str, Any]] = {}
         self.title_property = "Title"
         self.status_property = None
         self.priority_property = None
         self.channel_property = None
-        self._load_property_schema()
-
-    def _load_property_schema(self):
+        self.description_property = None
+        self._channel_builder: Optional[Callable[[str], Dict[str, Any]]] = None
+        self._schema_refresh_task: Optional[asyncio.Task] = None
+        # Notion API 초당 요청 제한(평균 3회)에 맞춰 동시 호출 수를 제한
+        self._notion_sem = asyncio.Semaphore(int(os.getenv("NOTION_MAX_CONCURRENCY", "3")))
+
+    async def setup(self):
+        """DB 속성 스키마 로딩 (등록 시 한 번 호출)"""
+        await self._load_property_schema()
+
+    async def _load_property_schema(self):
+        if not self.database_id:
+            logger.warning("NOTION_DATABASE_ID가 설정되지 않았습니다.")
+            return
+
+        cached = self._read_schema_cache()
+        if cached is not None:
+            # 디스크 캐시로 바로 시작하고 최신 스키마는 백그라운드에서 다시 조회
+            self._apply_schema(cached)
+            self._schema_refresh_task = asyncio.create_task(self._refresh_schema())
+            return
+
+        await self._refresh_schema()
+
+    async def _refresh_schema(self):
         try:
-            if not self.database_id:
-                logger.warning("NOTION_DATABASE_ID가 설정되지 않았습니다.")
-                return
-            database = self.client.databases.retrieve(self.database_id)
-            self.properties_schema = database.get("properties", {})
-
-            # 제목 필드(auto-detect)
-            for name, meta in self.properties_schema.items():
-                if meta.get("type") == "title":
-                    self.title_property = name
-                    break
-
-            # 상태/우선순위/채널 필드도 자동 감지
-            for name, meta in self.properties_schema.items():
-                prop_type = meta.get("type")
-                lower_name = name.lower()
-                if prop_type == "select" and lower_name.startswith("status"):
-                    self.status_property = name
-                if prop_type == "select" and "priority" in lower_name:
-                    self.priority_property = name
-                if "channel" in lower_name:
-                    self.channel_property = name
-
-            logger.info(
-                "Notion DB 속성 로딩: title=%s status=%s priority=%s channel=%s",
-                self.title_property,
-                self.status_property,
-                self.priority_property,
-                self.channel_property,
-            )
+            database = await self.client.databases.retrieve(self.database_id)
         except Exception as exc:  # pylint: disable=broad-except
             logger.warning("Notion DB 속성 조회 실패: %s", exc)
-            self.properties_schema = {}
+            return
+
+        properties = database.get("properties", {})
+        self._apply_schema(properties)
+        self._write_schema_cache(properties)
+
+    def _apply_schema(self, properties: Dict[str, Dict[str, Any]]):
+        self.properties_schema = properties
+
+        # 제목 필드(auto-detect)
+        title_property = "Title"
+        for name, meta in properties.items():
+            if meta.get("type") == "title":
+                title_property = name
+                break
+
+        # 상태/우선순위/채널 필드도 자동 감지
+        status_property = priority_property = channel_property = description_property = None
+        for name, meta in properties.items():
+            prop_type = meta.get("type")
+            lower_name = name.lower()
+            if prop_type == "select" and lower_name.startswith("status"):
+                status_property = name
+            if prop_type == "select" and "priority" in lower_name:
+                priority_property = name
+            if "channel" in lower_name:
+                channel_property = name
+            if prop_type == "rich_text" and "description" in lower_name:
+                description_property = name
+
+        self.title_property = title_property
+        self.status_property = status_property
+        self.priority_property = priority_property
+        self.channel_property = channel_property
+        self.description_property = description_property
+        # 지원하지 않는 타입이면 None → 채널 값은 기록하지 않음
+        self._channel_builder = (
+            CHANNEL_VALUE_BUILDERS.get(properties[channel_property].get("type"))
+            if channel_property
+            else None
+        )
+
+        logger.info(
+            "Notion DB 속성 로딩: title=%s status=%s priority=%s channel=%s description=%s",
+            self.title_property,
+            self.status_property,
+            self.priority_property,
+            self.channel_property,
+            self.description_property,
+        )
+
+    @property
+    def has_description_property(self) -> bool:
+        """설명(rich_text) 속성이 있을 때만 description 값을 저장"""
+        return self.description_property is not None
+
+    def _schema_cache_path(self) -> str:
+        return os.path.join(
+            os.path.expanduser("~"), ".cache", f"notion_schema_{self.database_id}.json"
+        )
+
+    def _read_schema_cache(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        path = self._schema_cache_path()
+        try:
+            if os.path.getmtime(path) < time.time() - SCHEMA_CACHE_TTL:
+                return None
+            with open(path, encoding="utf-8") as fp:
+                properties = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        return properties if isinstance(properties, dict) else None
+
+    def _write_schema_cache(self, properties: Dict[str, Dict[str, Any]]):
+        path = self._schema_cache_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as fp:
+                json.dump(properties, fp, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logger.warning("Notion 스키마 캐시 저장 실패 (%s): %s", path, err)
 
     async def execute(self, state: WorkflowState, task_params: Dict[str, Any]) -> ExecutionResult:
         try:
@@ -104,41 +201,64 @@ class NotionAgent(BaseAgent):
         if self.priority_property and priority:
             properties[self.priority_property] = {"select": {"name": priority}}
 
-        if self.channel_property and channel_name:
-            channel_meta = self.properties_schema.get(self.channel_property, {})
-            prop_type = channel_meta.get("type")
-            if prop_type == "rich_text":
-                properties[self.channel_property] = {
-                    "rich_text": [{"text": {"content": channel_name}}]
-                }
-            elif prop_type == "title":
-                properties[self.channel_property] = {
-                    "title": [{"text": {"content": channel_name}}]
-                }
-            elif prop_type == "select":
-                properties[self.channel_property] = {"select": {"name": channel_name}}
-            elif prop_type == "multi_select":
-                properties[self.channel_property] = {
-                    "multi_select": [{"name": channel_name}]
-                }
+        if self._channel_builder and channel_name:
+            properties[self.channel_property] = self._channel_builder(channel_name)
+
+        if self.description_property and description:
+            properties[self.description_property] = {
+                "rich_text": [{"text": {"content": description[:NOTION_MAX_TEXT_LENGTH]}}]
+            }
 
         payload = {
             "parent": {"database_id": self.database_id},
             "properties": properties,
         }
 
-        children = params.get("children")
+        children = params.get("children") or []
         if children:
-            payload["children"] = children
+            payload["children"] = children[:NOTION_MAX_BLOCKS_PER_REQUEST]
 
-        response = self.client.pages.create(**payload)
+        async with self._notion_sem:
+            response = await self.client.pages.create(**payload)
 
-        return {
+        # 페이지는 이미 생성됐으므로 블록 추가 실패는 예외로 올리지 않음
+        # (올리면 재시도 루프가 페이지를 새로 만들어 중복 페이지가 생김)
+        missing_blocks = await self._append_remaining_children(response["id"], children)
+
+        result = {
             "page_id": response["id"],
             "url": response["url"],
             "title": title,
             "status": status
         }
+        if missing_blocks:
+            result["partial"] = True
+            result["missing_blocks"] = missing_blocks
+        return result
+
+    async def _append_remaining_children(self, page_id: str, children: list) -> int:
+        """100개를 넘는 블록을 생성된 페이지에 나누어 추가. 추가하지 못한 블록 수를 반환"""
+        for start in range(NOTION_MAX_BLOCKS_PER_REQUEST, len(children), NOTION_MAX_BLOCKS_PER_REQUEST):
+            batch = children[start : start + NOTION_MAX_BLOCKS_PER_REQUEST]
+            for attempt in range(NOTION_APPEND_RETRIES + 1):
+                try:
+                    async with self._notion_sem:
+                        await self.client.blocks.children.append(block_id=page_id, children=batch)
+                    break
+                except Exception as exc:  # pylint: disable=broad-except
+                    if attempt < NOTION_APPEND_RETRIES:
+                        await asyncio.sleep(retry_backoff(attempt + 1))
+                        continue
+                    # 순서가 뒤섞이지 않도록 이후 배치도 추가하지 않음
+                    logger.warning(
+                        "Notion 블록 추가 실패 (page=%s, %d/%d개 누락): %s",
+                        page_id,
+                        len(children) - start,
+                        len(children),
+                        exc,
+                    )
+                    return len(children) - start
+        return 0
 
     async def _update_task(self, params: Dict[str, Any]) -> Dict[str, Any]:
         page_id = params.get("page_id")
@@ -155,10 +275,11 @@ class NotionAgent(BaseAgent):
                 "title": [{"text": {"content": params["title"]}}]
             }
 
-        response = self.client.pages.update(
-            page_id=page_id,
-            properties=properties
-        )
+        async with self._notion_sem:
+            response = await self.client.pages.update(
+                page_id=page_id,
+                properties=properties
+            )
 
         return {
             "page_id": response["id"],
@@ -179,13 +300,14 @@ class NotionAgent(BaseAgent):
                 }
             })
 
-        response = self.client.pages.create(
-            parent={"database_id": self.database_id},
-            properties={
-                self.title_property: {"title": [{"text": {"content": title}}]}
-            },
-            children=children
-        )
+        async with self._notion_sem:
+            response = await self.client.pages.create(
+                parent={"database_id": self.database_id},
+                properties={
+                    self.title_property: {"title": [{"text": {"content": title}}]}
+                },
+                children=children
+            )
 
         return {
             "page_id": response["id"],
@@ -1,19 +1,38 @@
 import asyncio
-import uuid
+import itertools
+import time
 import logging
-from datetime import datetime, timedelta
+from dataclasses import fields
+from datetime import datetime
 from typing import Dict, Optional
 
 from .models import WorkflowState, SystemState, AgentMetrics, ExecutionResult, TaskStatus
 
 logger = logging.getLogger(__name__)
 
+SESSION_TTL_SECONDS = 12 * 60 * 60
+
+# update_session으로 바꿀 수 있는 필드. updated_at 같은 파생 속성과 monotonic 시각은 제외
+_UPDATABLE_SESSION_FIELDS = frozenset(f.name for f in fields(WorkflowState)) - {"created_mono", "updated_mono"}
+
+# 세션별 변경에 쓰는 락 개수 (2의 거듭제곱, 세션 ID 해시로 선택)
+SESSION_LOCK_STRIPES = 32
+
+# 프로세스 내부에서만 쓰는 세션 ID: 시작 시각(ms) 기반 카운터를 16자리 hex로 사용
+_session_ids = itertools.count(int(time.time() * 1000) << 20)
+
 
 class StateManager:
-    def __init__(self, cleanup_interval: int = 3600):
+    def __init__(self, cleanup_interval: int = 3600, max_sessions: int = 10_000):
         self.system_state = SystemState()
         self.cleanup_interval = cleanup_interval
-        self._lock = asyncio.Lock()
+        self.max_sessions = max_sessions
+        # 세션 맵 삽입/삭제, 세션별 변경, 에이전트 메트릭은 서로 다른 락을 사용
+        self._map_lock = asyncio.Lock()
+        self._metrics_lock = asyncio.Lock()
+        # 에이전트별 메트릭 요약. 갱신 때마다 새 dict로 교체하므로 조회 시 얕은 복사로 충분
+        self._metrics_snapshot: Dict[str, Dict[str, any]] = {}
+        self._session_locks = tuple(asyncio.Lock() for _ in range(SESSION_LOCK_STRIPES))
         self._cleanup_task: Optional[asyncio.Task] = None
 
     async def start(self):
@@ -31,48 +50,72 @@ class StateManager:
             self._cleanup_task = None
             logger.info("StateManager cleanup task stopped.")
 
-    async def create_session(self, user_input: str, original_message: str) -> str:
-        session_id = str(uuid.uuid4())
+    def _lock_for(self, session_id: str) -> asyncio.Lock:
+        # 고정된 락 배열을 공유하므로 세션 종료 시 정리할 것이 없음
+        return self._session_locks[hash(session_id) & (SESSION_LOCK_STRIPES - 1)]
 
-        async with self._lock:
-            workflow_state = WorkflowState(
+    async def create_session(self, user_input: str, original_message: str) -> str:
+        session_id = f"{next(_session_ids):016x}"
+
+        evicted_id = None
+        async with self._map_lock:
+            sessions = self.system_state.active_sessions
+            if len(sessions) >= self.max_sessions:
+                # 가장 오래 갱신되지 않은 세션부터 밀어냄
+                evicted_id, _ = sessions.popitem(last=False)
+            sessions[session_id] = WorkflowState(
                 session_id=session_id,
                 user_input=user_input,
                 original_message=original_message
             )
-            self.system_state.active_sessions[session_id] = workflow_state
 
-        logger.info(f"Created new session: {session_id}")
+        if evicted_id is not None:
+            logger.warning("Session limit %d reached, evicted: %s", self.max_sessions, evicted_id)
+        logger.info("Created new session: %s", session_id)
         return session_id
 
     async def get_session(self, session_id: str) -> Optional[WorkflowState]:
-        async with self._lock:
-            return self.system_state.active_sessions.get(session_id)
+        # 읽기 전용 조회는 await 없이 끝나므로 락을 잡지 않음
+        return self.system_state.active_sessions.get(session_id)
 
     async def update_session(self, session_id: str, **kwargs) -> bool:
-        async with self._lock:
+        if session_id not in self.system_state.active_sessions:
+            return False
+
+        async with self._lock_for(session_id):
             session = self.system_state.active_sessions.get(session_id)
             if not session:
                 return False
 
             for key, value in kwargs.items():
-                if hasattr(session, key):
+                if key in _UPDATABLE_SESSION_FIELDS:
                     setattr(session, key, value)
-            session.updated_at = datetime.now()
+            session.touch()
+            self.system_state.active_sessions.move_to_end(session_id)
             return True
 
     async def add_execution_result(self, session_id: str, task_id: str, result: ExecutionResult) -> bool:
-        async with self._lock:
+        if session_id not in self.system_state.active_sessions:
+            return False
+
+        async with self._lock_for(session_id):
             session = self.system_state.active_sessions.get(session_id)
             if not session:
                 return False
 
+            previous = session.task_results.get(task_id)
+            if previous is not None:
+                session.task_status_counts[previous.status] -= 1
             session.task_results[task_id] = result
-            session.updated_at = datetime.now()
+            session.task_status_counts[result.status] += 1
+            session.touch()
+            self.system_state.active_sessions.move_to_end(session_id)
             return True
 
-    async def update_agent_metrics(self, agent_name: str, success: bool, execution_time: float):
-        async with self._lock:
+    async def update_agent_metrics(
+        self, agent_name: str, success: bool, execution_time: float, circuit_open: bool = False
+    ):
+        async with self._metrics_lock:
             if agent_name not in self.system_state.agent_metrics:
                 self.system_state.agent_metrics[agent_name] = AgentMetrics(agent_name=agent_name)
 
@@ -87,30 +130,35 @@ class StateManager:
             total = metrics.total_executions
             metrics.average_execution_time = ((metrics.average_execution_time * (total - 1)) + execution_time) / total
             metrics.last_execution = datetime.now()
+            metrics.circuit_open = circuit_open
+
+            self._metrics_snapshot[agent_name] = {
+                "success_rate": metrics.success_rate,
+                "total_executions": metrics.total_executions,
+                "average_execution_time": metrics.average_execution_time,
+                "circuit_open": metrics.circuit_open
+            }
 
     async def get_session_status(self, session_id: str) -> Dict[str, any]:
         session = await self.get_session(session_id)
         if not session:
             return {"error": "Session not found"}
 
-        completed_tasks = sum(1 for result in session.task_results.values() if result.status == TaskStatus.COMPLETED)
-        failed_tasks = sum(1 for result in session.task_results.values() if result.status == TaskStatus.FAILED)
-
         return {
             "session_id": session_id,
             "current_step": session.current_step,
             "total_tasks": len(session.task_results),
-            "completed_tasks": completed_tasks,
-            "failed_tasks": failed_tasks,
+            "completed_tasks": session.task_status_counts[TaskStatus.COMPLETED],
+            "failed_tasks": session.task_status_counts[TaskStatus.FAILED],
             "created_at": session.created_at,
             "updated_at": session.updated_at
         }
 
     async def close_session(self, session_id: str) -> bool:
-        async with self._lock:
+        async with self._map_lock:
             if session_id in self.system_state.active_sessions:
                 del self.system_state.active_sessions[session_id]
-                logger.info(f"Closed session: {session_id}")
+                logger.info("Closed session: %s", session_id)
                 return True
         return False
 
@@ -123,35 +171,29 @@ class StateManager:
             logger.debug("StateManager cleanup task cancelled.")
 
     async def _cleanup_old_sessions(self):
-        cutoff_time = datetime.now() - timedelta(hours=12)
+        cutoff = time.monotonic() - SESSION_TTL_SECONDS
 
-        async with self._lock:
-            expired_sessions = [
-                session_id
-                for session_id, session in self.system_state.active_sessions.items()
-                if session.updated_at < cutoff_time
-            ]
+        expired_count = 0
 
-            for session_id in expired_sessions:
-                del self.system_state.active_sessions[session_id]
+        # 중간에 await가 없어 다른 코루틴과 섞이지 않으므로 맵 락 없이 정리
+        # 세션 맵은 마지막 갱신 순서이므로 앞에서부터 만료되지 않은 세션이 나올 때까지만 확인
+        sessions = self.system_state.active_sessions
+        while sessions:
+            session = next(iter(sessions.values()))
+            if session.updated_mono >= cutoff:
+                break
+            sessions.popitem(last=False)
+            expired_count += 1
 
-            if expired_sessions:
-                logger.info(f"Cleaned up {len(expired_sessions)} expired sessions.")
+        if expired_count:
+            logger.info("Cleaned up %d expired sessions.", expired_count)
 
     async def get_system_metrics(self) -> Dict[str, any]:
-        async with self._lock:
-            return {
-                "active_sessions": len(self.system_state.active_sessions),
-                "total_agents": len(self.system_state.agent_metrics),
-                "agent_metrics": {
-                    name: {
-                        "success_rate": metrics.success_rate,
-                        "total_executions": metrics.total_executions,
-                        "average_execution_time": metrics.average_execution_time
-                    }
-                    for name, metrics in self.system_state.agent_metrics.items()
-                }
-            }
+        return {
+            "active_sessions": len(self.system_state.active_sessions),
+            "total_agents": len(self._metrics_snapshot),
+            "agent_metrics": dict(self._metrics_snapshot)
+        }
 
 
 state_manager = StateManager()
@@ -1,4 +1,7 @@
-from datetime import datetime
+import time
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Any
 
@@ -30,7 +33,8 @@ class TaskIntent(BaseModel):
     dependencies: List[str] = Field(default_factory=list)
 
 
-class ExecutionResult(BaseModel):
+@dataclass(slots=True)
+class ExecutionResult:
     task_id: str
     status: TaskStatus
     result: Optional[Dict[str, Any]] = None
@@ -39,28 +43,51 @@ class ExecutionResult(BaseModel):
     retry_count: int = 0
 
 
-class WorkflowState(BaseModel):
+@dataclass(slots=True)
+class WorkflowState:
+    """세션 진행 상태. 프로세스 내부에서만 쓰이므로 검증 없는 dataclass로 유지"""
+
     session_id: str
     user_input: str
     original_message: str
 
-    intents: List[TaskIntent] = Field(default_factory=list)
-    params: Dict[str, Any] = Field(default_factory=dict)
-    task_results: Dict[str, ExecutionResult] = Field(default_factory=dict)
+    intents: List[TaskIntent] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+    task_results: Dict[str, ExecutionResult] = field(default_factory=dict)
+    task_status_counts: "Counter[TaskStatus]" = field(default_factory=Counter)
     current_step: str = "start"
-    context: Dict[str, Any] = Field(default_factory=dict)
+    context: Dict[str, Any] = field(default_factory=dict)
+
+    # 경과 시간 계산은 monotonic 값으로 하고, datetime은 표시할 때만 만든다
+    created_at: datetime = field(default_factory=datetime.now)
+    created_mono: float = field(default_factory=time.monotonic)
+    updated_mono: float = field(default_factory=time.monotonic)
+
+    @property
+    def updated_at(self) -> datetime:
+        return self.created_at + timedelta(seconds=self.updated_mono - self.created_mono)
+
+    def touch(self) -> None:
+        self.updated_mono = time.monotonic()
 
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["intents"] = [intent.model_dump() for intent in self.intents]
+        # asdict는 Counter를 (키, 값) 쌍으로 다시 세므로 원본 카운트로 덮어씀
+        data["task_status_counts"] = dict(self.task_status_counts)
+        data["updated_at"] = self.updated_at
+        return data
 
 
-class AgentMetrics(BaseModel):
+@dataclass(slots=True)
+class AgentMetrics:
     agent_name: str
     total_executions: int = 0
     successful_executions: int = 0
     failed_executions: int = 0
     average_execution_time: float = 0.0
     last_execution: Optional[datetime] = None
+    circuit_open: bool = False
 
     @property
     def success_rate(self) -> float:
@@ -69,7 +96,9 @@ class AgentMetrics(BaseModel):
         return self.successful_executions / self.total_executions
 
 
-class SystemState(BaseModel):
-    active_sessions: Dict[str, WorkflowState] = Field(default_factory=dict)
-    agent_metrics: Dict[str, AgentMetrics] = Field(default_factory=dict)
-    global_context: Dict[str, Any] = Field(default_factory=dict)
+@dataclass(slots=True)
+class SystemState:
+    # 마지막 갱신 순서를 유지하는 LRU (가장 오래된 세션이 앞)
+    active_sessions: "OrderedDict[str, WorkflowState]" = field(default_factory=OrderedDict)
+    agent_metrics: Dict[str, AgentMetrics] = field(default_factory=dict)
+    global_context: Dict[str, Any] = field(default_factory=dict)
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 """간소화된 봇 런처"""
-import asyncio
-
-from improved_discord_bot import main  # noqa: E402
+from improved_discord_bot import run  # noqa: E402
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()